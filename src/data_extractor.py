@@ -1,117 +1,407 @@
 import re
 from typing import Dict, Any, Optional, List, Tuple
 import logging
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+import pandas as pd
+
+try:
+    import re2
+except ImportError:  # google-re2 is optional; fall back to one `re` scan per field
+    re2 = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Common patterns for healthcare documents, compiled once at import time.
+# Each pattern targets a single labeled line and is matched line by line.
+# Patterns must not contain adjacent repetitions that can match the same
+# characters (e.g. `[\s:]*\$?\s*`), which backtrack quadratically on long
+# runs of whitespace; nested name and code-label repetitions are bounded.
+_COMMON_PATTERNS = {
+    name: re.compile(pattern, re.IGNORECASE)
+    for name, pattern in {
+        'patient_name': r'(?:patient|name)[:\s]*(\w+(?:\s+\w+){0,6})',
+        'date_of_birth': r'(?:dob|date of birth)[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        'member_id': r'(?:member\s*id|policy\s*number)[:\s]*(\w+)',
+        'date_of_service': r'(?:date of service|service date|dos)[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        'provider_name': r'(?:provider|doctor|physician)[:\s]*(\w+(?:\s+\w+){0,6})',
+        'diagnosis_code': r'(?:diagnosis|dx)[\s\w]{0,40}code[\s:]*([A-Z]\d{2,5}(?:\.\d+)?)',
+        'procedure_code': r'(?:procedure|tx|treatment)[\s\w]{0,40}code[\s:]*([A-Z]\d{1,4}[A-Z]?\d{0,4})',
+        'amount': r'(?:amount|total|charge|balance)[\s:]*(?:\$\s*)?(\d+(?:\.\d{2})?)',
+        'phone': r'(?:phone|tel|mobile)[\s:]*([\(]?\d{3}[-\s\.\)]?\s*\d{3}[-\s\.]?\s*\d{4})'
+    }.items()
+}
+
+# Document type specific patterns
+_DOCTYPE_PATTERNS = {
+    doc_type: {
+        name: re.compile(pattern, re.IGNORECASE)
+        for name, pattern in patterns.items()
+    }
+    for doc_type, patterns in {
+        'insurance_claim': {
+            'claim_number': r'(?:claim(?:\s*#)?|id)[\s:]*([A-Z0-9-]+)',
+            'group_number': r'group(?:\s*#)?[\s:]*(\w+)',
+            'adjustment_reason': r'adjustment\s*reason[\s:]*([^\n]*)',
+            'patient_responsibility': r'patient\s*responsibility[\s:]*(?:\$\s*)?(\d+\.\d{2})'
+        },
+        'prescription': {
+            'medication': r'medication[\s:]*([^\n]*)',
+            'dosage': r'dosage[\s:]*([^\n]*)',
+            'frequency': r'frequency[\s:]*([^\n]*)',
+            'refills': r'refills?[\s:]*(\d+)',
+            'prescriber': r'prescriber[\s:]*([^\n]*)'
+        },
+        'medical_report': {
+            'report_type': r'report\s*type[\s:]*([^\n]*)',
+            'findings': r'findings[\s:]*([^\n]+)',
+            'impression': r'impression[\s:]*([^\n]+)',
+            'recommendations': r'recommendations?[\s:]*([^\n]+)'
+        }
+    }.items()
+}
+
+# Allowed characters for fields that capture the rest of their line. A value
+# only counts as a match if it fullmatches its format; checking the captured
+# value once stays linear, whereas a `[...]+$` pattern rescans the line from
+# every occurrence of the label.
+_VALUE_FORMATS = {
+    name: re.compile(pattern)
+    for name, pattern in {
+        'adjustment_reason': r'\w[\w\s]+',
+        'medication': r'[\w\s-]+',
+        'dosage': r'[\d\s\w/]+',
+        'frequency': r'[\w\s]+',
+        'prescriber': r'[\w\s\.]+',
+        'report_type': r'[\w\s]+'
+    }.items()
+}
+
+# Lowercase label substrings, one of which must appear on a line before the
+# field's pattern is run against it
+_LABEL_PROBES = {
+    'patient_name': ('patient', 'name'),
+    'date_of_birth': ('dob', 'date of birth'),
+    'member_id': ('member', 'policy'),
+    'date_of_service': ('date of service', 'service date', 'dos'),
+    'provider_name': ('provider', 'doctor', 'physician'),
+    'diagnosis_code': ('diagnosis', 'dx'),
+    'procedure_code': ('procedure', 'tx', 'treatment'),
+    'amount': ('amount', 'total', 'charge', 'balance'),
+    'phone': ('phone', 'tel', 'mobile'),
+    'claim_number': ('claim', 'id'),
+    'group_number': ('group',),
+    'adjustment_reason': ('adjustment',),
+    'patient_responsibility': ('responsibility',),
+    'medication': ('medication',),
+    'dosage': ('dosage',),
+    'frequency': ('frequency',),
+    'refills': ('refill',),
+    'prescriber': ('prescriber',),
+    'report_type': ('report',),
+    'findings': ('findings',),
+    'impression': ('impression',),
+    'recommendations': ('recommendation',)
+}
+
+# Fields converted to floats during post-processing
+_NUMERIC_FIELDS = ('amount', 'patient_responsibility')
+
+# Characters stripped from amounts before float conversion
+_MONEY_STRIP = str.maketrans('', '', '$, ')
+
+# strptime formats accepted for date fields, in order of preference
+_DATE_FORMATS = ('%m/%d/%Y', '%m-%d-%Y', '%Y-%m-%d', '%m/%d/%y', '%m-%d-%y')
+
+def _build_prefilter(patterns: Dict[str, re.Pattern]) -> Optional[Tuple[Any, List[str], List[str]]]:
+    """
+    Compile a dict of patterns into a single RE2 set that reports every
+    matching field in one pass over the text.
+
+    Patterns are added in multiline mode so `$` matches at each line end, as
+    it does when `re` runs them line by line. Patterns RE2 rejects (such as
+    lookaheads) are returned separately and always scanned with `re`.
+    Returns None when re2 isn't installed.
+    """
+    if re2 is None:
+        return None
+
+    options = re2.Options()
+    options.case_sensitive = False
+    pattern_set = re2.Set.SearchSet(options)
+
+    field_names = []
+    unsupported = []
+    for field, pattern in patterns.items():
+        try:
+            pattern_set.Add('(?m)' + pattern.pattern)
+        except re2.error:
+            unsupported.append(field)
+            continue
+        field_names.append(field)
+
+    pattern_set.Compile()
+    return pattern_set, field_names, unsupported
+
+_COMMON_PREFILTER = _build_prefilter(_COMMON_PATTERNS)
+_DOCTYPE_PREFILTERS = {
+    doc_type: _build_prefilter(patterns)
+    for doc_type, patterns in _DOCTYPE_PATTERNS.items()
+}
+
+@dataclass(frozen=True)
+class Validation:
+    """Outcome of validating a document's extracted fields."""
+    __slots__ = ('is_valid', 'errors', 'warnings')
+    
+    is_valid: bool
+    errors: List[str]
+    warnings: List[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'is_valid': self.is_valid,
+            'errors': self.errors,
+            'warnings': self.warnings
+        }
+
+@dataclass(frozen=True)
+class ExtractionResult:
+    """Structured data extracted from a single document."""
+    __slots__ = ('extraction_timestamp', 'document_type', 'extracted_fields',
+                 'validation', 'error')
+    
+    extraction_timestamp: str
+    document_type: str
+    extracted_fields: Dict[str, Any]
+    validation: Optional[Validation]
+    error: Optional[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to plain dicts for JSON serialization."""
+        result = {
+            'extraction_timestamp': self.extraction_timestamp,
+            'document_type': self.document_type,
+            'extracted_fields': self.extracted_fields
+        }
+        if self.validation is not None:
+            result['validation'] = self.validation.to_dict()
+        if self.error is not None:
+            result['error'] = self.error
+        return result
+
 class HealthcareDataExtractor:
     """Extract structured data from healthcare documents."""
     
     def __init__(self):
-        # Common patterns for healthcare documents
-        self.patterns = {
-            'patient_name': r'(?i)(?:patient|name)[:\s]*(\w+(?:\s+\w+)*)',
-            'date_of_birth': r'(?i)(?:dob|date of birth)[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            'member_id': r'(?i)(?:member\s*id|policy\s*number)[:\s]*(\w+)',
-            'date_of_service': r'(?i)(?:date of service|service date|dos)[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            'provider_name': r'(?i)(?:provider|doctor|physician)[:\s]*(\w+(?:\s+\w+)*)',
-            'diagnosis_code': r'(?i)(?:diagnosis|dx)[\s\w]*code[\s:]*([A-Z]\d{2,5}(?:\.\d+)?)',
-            'procedure_code': r'(?i)(?:procedure|tx|treatment)[\s\w]*code[\s:]*([A-Z]\d{1,4}[A-Z]?\d{0,4})',
-            'amount': r'(?i)(?:amount|total|charge|balance)[\s:]*\$?\s*(\d+(?:\.\d{2})?)',
-            'phone': r'(?i)(?:phone|tel|mobile)[\s:]*([\(]?\d{3}[-\s\.\)]?\s*\d{3}[-\s\.]?\s*\d{4})'
-        }
+        # Precompiled patterns shared by every extractor instance
+        self.patterns = _COMMON_PATTERNS
+        self.doc_type_patterns = _DOCTYPE_PATTERNS
+        self._prefilter = _COMMON_PREFILTER
+        self._doc_type_prefilters = _DOCTYPE_PREFILTERS
+        self._label_probes = _LABEL_PROBES
+        self._value_formats = _VALUE_FORMATS
         
-        # Document type specific patterns
-        self.doc_type_patterns = {
-            'insurance_claim': {
-                'claim_number': r'(?i)(?:claim\s*#?|id)[\s:]*([A-Z0-9-]+)',
-                'group_number': r'(?i)group\s*#?[\s:]*(\w+)',
-                'adjustment_reason': r'(?i)adjustment\s*reason[\s:]*(\w[\w\s]+?)(?=\n|$)',
-                'patient_responsibility': r'(?i)patient\s*responsibility[\s:]*\$?\s*(\d+\.\d{2})'
-            },
-            'prescription': {
-                'medication': r'(?i)medication[\s:]*([\w\s-]+)(?=\n|$)',
-                'dosage': r'(?i)dosage[\s:]*([\d\s\w/]+)(?=\n|$)',
-                'frequency': r'(?i)frequency[\s:]*([\w\s]+)(?=\n|$)',
-                'refills': r'(?i)refills?[\s:]*(\d+)',
-                'prescriber': r'(?i)prescriber[\s:]*([\w\s\.]+)(?=\n|$)'
-            },
-            'medical_report': {
-                'report_type': r'(?i)report\s*type[\s:]*([\w\s]+)(?=\n|$)',
-                'findings': r'(?i)findings[\s:]*([\w\s\.,-]+)(?=\n|\Z)',
-                'impression': r'(?i)impression[\s:]*([\w\s\.,-]+)(?=\n|\Z)',
-                'recommendations': r'(?i)recommendations?[\s:]*([\w\s\.,-]+)(?=\n|\Z)'
-            }
-        }
+        # Last strptime format that parsed successfully; batches tend to share one
+        self._last_fmt = None
 
-    def extract_structured_data(self, text: str, doc_type: str = None) -> Dict[str, Any]:
+    def extract_structured_data(self, text: str, doc_type: str = None,
+                                timestamp: str = None) -> ExtractionResult:
         """
         Extract structured data from document text.
         
         Args:
             text: Extracted text from OCR
             doc_type: Document type (e.g., 'insurance_claim', 'prescription')
+            timestamp: ISO timestamp to record; defaults to the current UTC time
             
         Returns:
-            Dictionary of extracted fields and their values
+            ExtractionResult holding the extracted fields and their validation
         """
+        timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+        doc_type_name = doc_type or 'unknown'
+        
         if not text:
-            return {}
-            
-        # Initialize result with basic metadata
-        result = {
-            'extraction_timestamp': datetime.utcnow().isoformat(),
-            'document_type': doc_type or 'unknown',
-            'extracted_fields': {}
-        }
+            return ExtractionResult(timestamp, doc_type_name, {}, None, None)
         
+        fields = {}
         try:
+            # Split into lines once; every pattern matches within a single line
+            lines = self._split_lines(text)
+            
             # Extract common fields
-            common_fields = self._extract_using_patterns(text, self.patterns)
-            result['extracted_fields'].update(common_fields)
+            common_fields = self._extract_using_patterns(
+                text,
+                self.patterns,
+                self._prefilter,
+                lines
+            )
+            fields.update(common_fields)
             
             # Extract document type specific fields
             if doc_type and doc_type in self.doc_type_patterns:
                 doc_specific = self._extract_using_patterns(
                     text, 
-                    self.doc_type_patterns[doc_type]
+                    self.doc_type_patterns[doc_type],
+                    self._doc_type_prefilters.get(doc_type),
+                    lines
                 )
-                result['extracted_fields'].update(doc_specific)
-            
-            # Post-process extracted data
-            result['extracted_fields'] = self._post_process_fields(
-                result['extracted_fields']
-            )
+                fields.update(doc_specific)
             
-            # Add validation results
-            result['validation'] = self._validate_extracted_data(
-                result['extracted_fields'], 
-                doc_type
-            )
+            # Post-process and validate extracted data in a single pass
+            fields, validation = self._post_process_fields(fields, doc_type)
             
         except Exception as e:
             logger.error(f"Error extracting structured data: {str(e)}")
-            result['error'] = str(e)
+            return ExtractionResult(timestamp, doc_type_name, fields, None, str(e))
         
-        return result
+        return ExtractionResult(timestamp, doc_type_name, fields, validation, None)
+    
+    def extract_structured_data_batch(self, texts: List[str], doc_types: List[str]) -> pd.DataFrame:
+        """
+        Extract structured data from many documents at once.
+        
+        Every line of every document is gathered into one Series, and each
+        pattern is applied across it in a single pandas call. As in
+        extract_structured_data, the first matching line of a document wins.
+        
+        Args:
+            texts: Extracted text from OCR, one entry per document
+            doc_types: Document type for each entry in texts
+            
+        Returns:
+            DataFrame with one row per document and one column per field
+        """
+        docs = pd.Series(texts, dtype=object).fillna('')
+        types = pd.Series(doc_types, index=docs.index, dtype=object).fillna('unknown')
+        
+        # One row per line, indexed by the position of its document
+        lines = docs.map(str.splitlines).explode().dropna()
+        
+        df = pd.DataFrame({'document_type': types})
+        
+        # Extract common fields
+        for field, pattern in self.patterns.items():
+            df[field] = self._extract_first_match(lines, pattern, self._value_formats.get(field))
+        
+        # Extract document type specific fields on that type's lines only
+        for doc_type, patterns in self.doc_type_patterns.items():
+            type_lines = lines[lines.index.isin(types.index[types == doc_type])]
+            if type_lines.empty:
+                continue
+            for field, pattern in patterns.items():
+                df[field] = self._extract_first_match(
+                    type_lines, pattern, self._value_formats.get(field)
+                )
+        
+        # Post-process extracted data
+        for column in df.columns:
+            if column in _NUMERIC_FIELDS:
+                df[column] = pd.to_numeric(
+                    df[column].astype(object).str.replace(r'[$, ]', '', regex=True),
+                    errors='coerce'
+                )
+            elif 'date' in column.lower() or 'dob' in column.lower():
+                raw = df[column].astype(object)
+                # Try the same formats as the single-document path, in order
+                parsed = pd.to_datetime(raw, format=_DATE_FORMATS[0], errors='coerce')
+                for fmt in _DATE_FORMATS[1:]:
+                    parsed = parsed.combine_first(pd.to_datetime(raw, format=fmt, errors='coerce'))
+                # Keep the original string when it couldn't be parsed
+                df[column] = parsed.dt.strftime('%Y-%m-%d').astype(object).where(parsed.notna(), raw)
+        
+        return df
+    
+    @staticmethod
+    def _extract_first_match(lines: pd.Series, pattern: re.Pattern,
+                             value_format: Optional[re.Pattern] = None) -> pd.Series:
+        """Return the first capture of pattern per document, indexed by document."""
+        values = lines.str.extract(pattern, expand=False)
+        if value_format is not None:
+            values = values.where(values.str.fullmatch(value_format).fillna(False).astype(bool))
+        # Empty captures count as no match, so first() moves on to the next line
+        values = values.str.strip().replace('', pd.NA)
+        return values.groupby(level=0).first()
     
-    def _extract_using_patterns(self, text: str, patterns: Dict) -> Dict[str, str]:
-        """Extract fields using regex patterns."""
+    @staticmethod
+    def _split_lines(text: str) -> List[Tuple[str, str]]:
+        """Split text into (line, lowercased line) pairs."""
+        return [(line, line.lower()) for line in text.splitlines()]
+    
+    def _extract_using_patterns(self, text: str, patterns: Dict[str, re.Pattern],
+                                prefilter: Optional[Tuple] = None,
+                                lines: Optional[List[Tuple[str, str]]] = None) -> Dict[str, str]:
+        """
+        Extract fields using precompiled regex patterns.
+
+        When an RE2 prefilter is available, the text is scanned once to find
+        which fields match at all. The remaining patterns are then run line by
+        line, and only against lines containing one of the field's labels.
+        
+        RE2's \\w, \\d and \\s are ASCII-only while `re` is Unicode-aware, so
+        the prefilter is only trusted for ASCII text.
+        """
+        if lines is None:
+            lines = self._split_lines(text)
+
+        if prefilter is not None and text.isascii():
+            # Scan the same lines `re` will see: splitlines() also breaks on
+            # \r, \f, \v and \x1c-\x1e, where RE2's multiline `$` does not
+            pattern_set, field_names, unsupported = prefilter
+            joined = "\n".join(line for line, _ in lines)
+            matched = {field_names[i] for i in pattern_set.Match(joined) or []}
+            matched.update(unsupported)
+            candidates = [field for field in patterns if field in matched]
+        else:
+            candidates = list(patterns)
+
+        # Resolve each field's probes, bound search method and value format
+        # once, and drop fields from the pending list as soon as they are found
+        pending = [
+            (field, self._label_probes.get(field), patterns[field].search,
+             self._value_formats.get(field))
+            for field in candidates
+        ]
+
         extracted = {}
-        for field, pattern in patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-            if match:
+        for line, lower_line in lines:
+            if not pending:
+                break
+            remaining = []
+            for entry in pending:
+                field, probes, search, value_format = entry
+                if probes is not None and not any(probe in lower_line for probe in probes):
+                    remaining.append(entry)
+                    continue
+                match = search(line)
                 # Get the first capturing group (the value we want)
-                value = match.group(1).strip() if match.groups() else match.group(0).strip()
+                value = match.group(1 if match.re.groups else 0) if match else None
+                if value is None or (value_format is not None and not value_format.fullmatch(value)):
+                    remaining.append(entry)
+                    continue
+                value = value.strip()
+                if not value:
+                    # A bare label carries no value; keep looking on later lines
+                    remaining.append(entry)
+                    continue
                 extracted[field] = value
-        return extracted
+            pending = remaining
+
+        # Keep fields in pattern order regardless of where they appeared
+        return {field: extracted[field] for field in candidates if field in extracted}
     
-    def _post_process_fields(self, fields: Dict[str, str]) -> Dict[str, Any]:
-        """Clean and normalize extracted fields."""
+    def _post_process_fields(self, fields: Dict[str, str],
+                             doc_type: str = None) -> Tuple[Dict[str, Any], Validation]:
+        """
+        Clean and normalize extracted fields, validating them as they go.
+        
+        Returns:
+            Tuple of (processed fields, validation results)
+        """
         processed = {}
+        warnings = []
         for key, value in fields.items():
             if not value:
                 continue
@@ -120,45 +410,58 @@ class HealthcareDataExtractor:
             cleaned = value.strip()
             
             # Convert numeric fields
-            if key in ['amount', 'patient_responsibility']:
+            if key in _NUMERIC_FIELDS:
                 try:
-                    cleaned = float(cleaned.replace('$', '').replace(',', '').strip())
+                    cleaned = float(cleaned.translate(_MONEY_STRIP))
                 except (ValueError, AttributeError):
                     pass
             
-            # Convert date fields
+            # Convert date fields, keeping the original if parsing fails
             elif 'date' in key.lower() or 'dob' in key.lower():
-                cleaned = self._parse_date(cleaned)
+                parsed = self._to_date(cleaned)
+                if parsed is None:
+                    warnings.append(f"Invalid date format for {key}: {cleaned}")
+                else:
+                    cleaned = parsed.isoformat()
             
             processed[key] = cleaned
-            
-        return processed
+        
+        errors = self._validate_extracted_data(processed, doc_type)
+        return processed, Validation(not errors, errors, warnings)
     
-    def _parse_date(self, date_str: str) -> str:
-        """Parse date string into ISO format."""
-        if not date_str:
-            return None
-            
+    def _to_date(self, date_str: str) -> Optional[date]:
+        """
+        Convert a date string to a date, or None if no known format matches.
+        
+        ISO strings are handled by fromisoformat; otherwise the last format
+        that worked is tried before falling back to the full list.
+        """
         try:
-            # Try common date formats
-            for fmt in ['%m/%d/%Y', '%m-%d-%Y', '%Y-%m-%d', '%m/%d/%y', '%m-%d-%y']:
-                try:
-                    dt = datetime.strptime(date_str, fmt)
-                    return dt.date().isoformat()
-                except ValueError:
-                    continue
-        except Exception as e:
-            logger.warning(f"Could not parse date '{date_str}': {str(e)}")
-            
-        return date_str  # Return original if parsing fails
+            return datetime.fromisoformat(date_str).date()
+        except (ValueError, TypeError):
+            pass
+        
+        if self._last_fmt:
+            try:
+                return datetime.strptime(date_str, self._last_fmt).date()
+            except ValueError:
+                pass
+        
+        for fmt in _DATE_FORMATS:
+            if fmt == self._last_fmt:
+                continue
+            try:
+                dt = datetime.strptime(date_str, fmt)
+            except ValueError:
+                continue
+            self._last_fmt = fmt
+            return dt.date()
+        
+        return None
     
-    def _validate_extracted_data(self, fields: Dict[str, Any], doc_type: str = None) -> Dict[str, Any]:
-        """Validate extracted data against business rules."""
-        validation = {
-            'is_valid': True,
-            'errors': [],
-            'warnings': []
-        }
+    def _validate_extracted_data(self, fields: Dict[str, Any], doc_type: str = None) -> List[str]:
+        """Check required fields for the document type and return any errors."""
+        errors = []
         
         # Required fields by document type
         required_fields = {
@@ -171,18 +474,9 @@ class HealthcareDataExtractor:
         if doc_type in required_fields:
             for field in required_fields[doc_type]:
                 if field not in fields or not fields[field]:
-                    validation['is_valid'] = False
-                    validation['errors'].append(f"Missing required field: {field}")
-        
-        # Validate date formats
-        for field, value in fields.items():
-            if isinstance(value, str) and ('date' in field.lower() or 'dob' in field.lower()):
-                try:
-                    datetime.fromisoformat(value)
-                except (ValueError, TypeError):
-                    validation['warnings'].append(f"Invalid date format for {field}: {value}")
+                    errors.append(f"Missing required field: {field}")
         
-        return validation
+        return errors
 
 # Example usage
 if __name__ == "__main__":
@@ -206,4 +500,4 @@ if __name__ == "__main__":
     result = extractor.extract_structured_data(sample_text, 'insurance_claim')
     
     import json
-    print(json.dumps(result, indent=2))
+    print(json.dumps(result.to_dict(), indent=2))
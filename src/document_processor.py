@@ -1,46 +1,97 @@
 import os
+import asyncio
+import functools
+import time
+from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import logging
 from dotenv import load_dotenv
-from azure.ai.formrecognizer import DocumentAnalysisClient
+from azure.ai.formrecognizer.aio import DocumentAnalysisClient
 from azure.core.credentials import AzureKeyCredential
 from azure.cognitiveservices.vision.computervision import ComputerVisionClient
 from azure.cognitiveservices.vision.computervision.models import OperationStatusCodes
 from msrest.authentication import CognitiveServicesCredentials
 
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; fall back to one substring test per keyword
+    ahocorasick = None
+
 # Use absolute import for better compatibility
 from src.data_extractor import HealthcareDataExtractor
+from src.local_ocr import LocalOcrBackend
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Load environment variables from .env file once per process
+load_dotenv()
+
+# OCR polling backoff bounds, in seconds
+OCR_POLL_INITIAL_DELAY = 0.5
+OCR_POLL_MAX_DELAY = 4.0
+
+# Keywords identifying each document type, in order of precedence
+DOCUMENT_TYPE_KEYWORDS = {
+    'claim': 'insurance_claim',
+    'prescription': 'prescription',
+    'report': 'medical_report'
+}
+
+# Number of lines from the first page scanned for document type keywords
+DOCUMENT_TYPE_SCAN_LINES = 20
+
+def _build_keyword_automaton():
+    """
+    Build an Aho-Corasick automaton over DOCUMENT_TYPE_KEYWORDS so all
+    keywords are found in a single pass. Returns None without pyahocorasick.
+    """
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for rank, (keyword, doc_type) in enumerate(DOCUMENT_TYPE_KEYWORDS.items()):
+        automaton.add_word(keyword, (rank, doc_type))
+    automaton.make_automaton()
+    return automaton
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+def _create_form_client() -> DocumentAnalysisClient:
+    """
+    Create a Form Recognizer client.
+    
+    The async client's aiohttp session is bound to the event loop it first
+    runs on, so it is opened and closed per call rather than cached.
+    """
+    return DocumentAnalysisClient(
+        endpoint=os.getenv("AZURE_FORM_RECOGNIZER_ENDPOINT"),
+        credential=AzureKeyCredential(os.getenv("AZURE_FORM_RECOGNIZER_KEY"))
+    )
+
+@functools.lru_cache(maxsize=1)
+def _get_vision_client() -> ComputerVisionClient:
+    """Create the Computer Vision client once and share it across processors."""
+    return ComputerVisionClient(
+        endpoint=os.getenv("AZURE_COMPUTER_VISION_ENDPOINT"),
+        credentials=CognitiveServicesCredentials(os.getenv("AZURE_COMPUTER_VISION_KEY"))
+    )
+
 class HealthcareDocumentProcessor:
     """Process healthcare documents with classification and OCR capabilities."""
     
     def __init__(self):
-        """Initialize the document processor with Azure credentials."""
-        load_dotenv()  # Load environment variables from .env file
-        
-        # Initialize Form Recognizer client
-        form_recognizer_endpoint = os.getenv("AZURE_FORM_RECOGNIZER_ENDPOINT")
-        form_recognizer_key = os.getenv("AZURE_FORM_RECOGNIZER_KEY")
-        
-        # Initialize Computer Vision client
-        vision_endpoint = os.getenv("AZURE_COMPUTER_VISION_ENDPOINT")
-        vision_key = os.getenv("AZURE_COMPUTER_VISION_KEY")
-        
-        # Initialize clients
-        self.form_recognizer_client = DocumentAnalysisClient(
-            endpoint=form_recognizer_endpoint,
-            credential=AzureKeyCredential(form_recognizer_key)
-        )
+        """
+        Initialize the document processor.
         
-        self.vision_client = ComputerVisionClient(
-            endpoint=vision_endpoint,
-            credentials=CognitiveServicesCredentials(vision_key)
-        )
+        The Computer Vision client is created lazily on first use and shared
+        by every processor in the process; Form Recognizer clients are opened
+        per classification call.
+        """
+        # Select the OCR backend; Azure Computer Vision unless OCR_BACKEND=rapidocr
+        self.ocr_backend = os.getenv("OCR_BACKEND", "azure").lower()
+        self.local_ocr = self._create_local_ocr(self.ocr_backend)
         
         # Load document types from environment
         self.document_types = os.getenv("DOCUMENT_TYPES", "").split(",")
@@ -48,7 +99,11 @@ class HealthcareDocumentProcessor:
         # Initialize data extractor
         self.data_extractor = HealthcareDataExtractor()
     
-    def classify_document(self, document_path: str) -> Dict:
+    @property
+    def vision_client(self) -> ComputerVisionClient:
+        return _get_vision_client()
+    
+    async def classify_document(self, document_path: str) -> Dict:
         """
         Classify a document using Azure Form Recognizer.
         
@@ -59,12 +114,13 @@ class HealthcareDocumentProcessor:
             Dict containing classification results
         """
         try:
-            with open(document_path, "rb") as f:
-                poller = self.form_recognizer_client.begin_analyze_document(
-                    "prebuilt-document",
-                    document=f
-                )
-                result = poller.result()
+            async with _create_form_client() as form_recognizer_client:
+                with open(document_path, "rb") as f:
+                    poller = await form_recognizer_client.begin_analyze_document(
+                        "prebuilt-document",
+                        document=f
+                    )
+                    result = await poller.result()
                 
             # Extract key information
             doc_type = self._determine_document_type(result)
@@ -80,10 +136,45 @@ class HealthcareDocumentProcessor:
             logger.error(f"Error classifying document: {str(e)}")
             raise
     
-    def extract_text(self, document_path: str) -> Dict:
+    @staticmethod
+    def _create_local_ocr(backend: str) -> Optional[LocalOcrBackend]:
+        """Create the local OCR backend, or None when Azure OCR is selected."""
+        if backend == "azure":
+            return None
+        if backend == "rapidocr":
+            return LocalOcrBackend.from_env()
+        raise ValueError(f"Unknown OCR_BACKEND: {backend}")
+    
+    async def extract_text(self, document_path: str) -> Dict:
         """
         Extract text from a document using OCR.
         
+        Uses the local OCR backend when one is configured, otherwise
+        Azure Computer Vision.
+        
+        Args:
+            document_path: Path to the document to process
+            
+        Returns:
+            Dict containing extracted text and metadata
+        """
+        if self.local_ocr is not None:
+            try:
+                return await self.local_ocr.extract_text(document_path)
+            except Exception as e:
+                logger.error(f"Error extracting text: {str(e)}")
+                raise
+        
+        return await self._extract_text_azure(document_path)
+    
+    async def _extract_text_azure(self, document_path: str) -> Dict:
+        """
+        Extract text from a document using Azure Computer Vision OCR.
+        
+        The Computer Vision SDK has no async client, so its blocking calls run
+        in the default executor while the status poll backs off with
+        asyncio.sleep, letting OCR for several documents overlap.
+        
         Args:
             document_path: Path to the document to process
             
@@ -91,34 +182,42 @@ class HealthcareDocumentProcessor:
             Dict containing extracted text and metadata
         """
         try:
+            loop = asyncio.get_running_loop()
             with open(document_path, "rb") as f:
                 # Using Computer Vision for OCR
-                read_operation = self.vision_client.read_in_stream(
-                    image=f,
-                    raw=True
+                read_operation = await loop.run_in_executor(
+                    None,
+                    lambda: self.vision_client.read_in_stream(image=f, raw=True)
                 )
                 
                 # Get the operation location (URL with the operation ID)
                 operation_location = read_operation.headers["Operation-Location"]
                 operation_id = operation_location.split("/")[-1]
                 
-                # Wait for the operation to complete
-                import time
+                # Wait for the operation to complete, backing off exponentially
+                delay = OCR_POLL_INITIAL_DELAY
                 while True:
-                    result = self.vision_client.get_read_result(operation_id)
+                    result = await loop.run_in_executor(
+                        None,
+                        self.vision_client.get_read_result,
+                        operation_id
+                    )
                     if result.status.lower() not in ['notstarted', 'running']:
                         break
-                    time.sleep(1)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, OCR_POLL_MAX_DELAY)
                 
                 # Extract the text
-                extracted_text = []
+                extracted_text = ""
                 if result.status == OperationStatusCodes.succeeded:
-                    for page in result.analyze_result.read_results:
-                        for line in page.lines:
-                            extracted_text.append(line.text)
+                    extracted_text = "\n".join(
+                        line.text
+                        for page in result.analyze_result.read_results
+                        for line in page.lines
+                    )
                 
                 return {
-                    "text": "\n".join(extracted_text),
+                    "text": extracted_text,
                     "language": result.analyze_result.language if hasattr(result.analyze_result, 'language') else "unknown",
                     "pages": len(result.analyze_result.read_results) if hasattr(result.analyze_result, 'read_results') else 0
                 }
@@ -127,7 +226,7 @@ class HealthcareDocumentProcessor:
             logger.error(f"Error extracting text: {str(e)}")
             raise
     
-    def process_document(self, document_path: str) -> Dict:
+    async def process_document(self, document_path: str) -> Dict:
         """
         Process a document through the entire pipeline.
         
@@ -138,24 +237,36 @@ class HealthcareDocumentProcessor:
             Dict containing processing results
         """
         try:
-            start_time = datetime.utcnow()
+            start_time = time.monotonic_ns()
             
-            # Step 1: Classify the document
-            classification = self.classify_document(document_path)
+            # Steps 1 and 2: Classify the document and extract text using OCR.
+            # Both only read the file, so the two service calls run concurrently.
+            classify_task = asyncio.create_task(self.classify_document(document_path))
+            ocr_task = asyncio.create_task(self.extract_text(document_path))
+            try:
+                classification, ocr_result = await asyncio.gather(classify_task, ocr_task)
+            except BaseException:
+                # gather() leaves the other call running on failure; cancel it
+                # and wait so it stops polling before the upload is removed
+                for task in (classify_task, ocr_task):
+                    task.cancel()
+                await asyncio.gather(classify_task, ocr_task, return_exceptions=True)
+                raise
             doc_type = classification.get('document_type', 'unknown')
-            
-            # Step 2: Extract text using OCR
-            ocr_result = self.extract_text(document_path)
             extracted_text = ocr_result.get('text', '')
             
+            # Format the user-facing timestamp once for the whole result
+            timestamp = datetime.now(timezone.utc).isoformat()
+            
             # Step 3: Extract structured data
             structured_data = self.data_extractor.extract_structured_data(
                 text=extracted_text,
-                doc_type=doc_type
+                doc_type=doc_type,
+                timestamp=timestamp
             )
             
             # Calculate processing time
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
+            processing_time = (time.monotonic_ns() - start_time) / 1e9
             
             # Combine results
             return {
@@ -165,12 +276,12 @@ class HealthcareDocumentProcessor:
                     "language": ocr_result.get('language', 'unknown'),
                     "pages": ocr_result.get('pages', 1)
                 },
-                "structured_data": structured_data,
+                "structured_data": structured_data.to_dict(),
                 "metadata": {
                     "filename": os.path.basename(document_path),
                     "file_size": os.path.getsize(document_path),
                     "processing_time_seconds": round(processing_time, 2),
-                    "processing_timestamp": datetime.utcnow().isoformat()
+                    "processing_timestamp": timestamp
                 }
             }
             
@@ -184,16 +295,41 @@ class HealthcareDocumentProcessor:
         This is a simplified example - in production, you'd want to implement
         more sophisticated logic based on your document types.
         """
-        # This is a placeholder - implement your own document type detection logic
-        # based on the analysis_result content
-        if "claim" in str(analysis_result).lower():
-            return "insurance_claim"
-        elif "prescription" in str(analysis_result).lower():
-            return "prescription"
-        elif "report" in str(analysis_result).lower():
-            return "medical_report"
-        else:
-            return "unknown"
+        # Prefer the model's own document type when it maps to one of ours
+        if analysis_result.documents and analysis_result.documents[0].doc_type:
+            doc_type = self._match_document_type(analysis_result.documents[0].doc_type)
+            if doc_type:
+                return doc_type
+        
+        # Otherwise look at the heading lines of the first page only, rather
+        # than serializing the whole analysis result
+        if analysis_result.pages:
+            lines = analysis_result.pages[0].lines or []
+            heading = "\n".join(line.content for line in lines[:DOCUMENT_TYPE_SCAN_LINES])
+            doc_type = self._match_document_type(heading)
+            if doc_type:
+                return doc_type
+        
+        return "unknown"
+    
+    @staticmethod
+    def _match_document_type(text: str) -> Optional[str]:
+        """Return the document type of the highest-precedence keyword in text."""
+        text = text.lower()
+        
+        if _KEYWORD_AUTOMATON is not None:
+            best = None
+            for _, (rank, doc_type) in _KEYWORD_AUTOMATON.iter(text):
+                if rank == 0:
+                    return doc_type
+                if best is None or rank < best[0]:
+                    best = (rank, doc_type)
+            return best[1] if best else None
+        
+        for keyword, doc_type in DOCUMENT_TYPE_KEYWORDS.items():
+            if keyword in text:
+                return doc_type
+        return None
 
 # Example usage
 if __name__ == "__main__":
@@ -204,7 +340,7 @@ if __name__ == "__main__":
     test_doc = "path/to/your/document.pdf"
     
     if os.path.exists(test_doc):
-        result = processor.process_document(test_doc)
+        result = asyncio.run(processor.process_document(test_doc))
         print("Document processing results:")
         print(f"Document Type: {result['classification']['document_type']}")
         print(f"Extracted Text: {result['extracted_text']['text'][:200]}...")  # Print first 200 chars
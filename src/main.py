@@ -1,11 +1,15 @@
-from fastapi import FastAPI, UploadFile, HTTPException, status
+from fastapi import FastAPI, UploadFile, HTTPException, Header, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Tuple
+import asyncio
+import hashlib
 import os
 import uuid
 from pathlib import Path
+from diskcache import Cache
 # Use absolute import for better compatibility
 from src.document_processor import HealthcareDocumentProcessor
 import logging
@@ -18,10 +22,25 @@ logger = logging.getLogger(__name__)
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Uploads are copied to disk in chunks of this size to bound memory use
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Pipeline results keyed by the SHA-256 of the uploaded bytes, so resubmitted
+# documents skip the Azure calls entirely. Entries hold OCR text and patient
+# data, so they expire after RESULT_CACHE_TTL seconds (default one day).
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "cache")
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", 24 * 60 * 60))
+result_cache = Cache(RESULT_CACHE_DIR)
+
+# Maximum number of documents from one /batch/ request processed at a time,
+# so a large batch doesn't exhaust Azure rate limits or threadpool workers
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 4))
+
 app = FastAPI(
     title="Healthcare Document Processing API",
     description="API for classifying and processing healthcare documents",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Enable CORS
@@ -43,43 +62,94 @@ class DocumentResponse(BaseModel):
     extracted_text: Optional[str] = None
     error: Optional[str] = None
 
+async def _save_upload(file: UploadFile) -> Tuple[str, str, str]:
+    """
+    Save an uploaded file under a unique name.
+    
+    Returns:
+        Tuple of (document_id, path, SHA-256 hex digest of the contents)
+    """
+    doc_id = str(uuid.uuid4())
+    file_extension = os.path.splitext(file.filename)[1] if file.filename else '.bin'
+    file_path = os.path.join(UPLOAD_DIR, f"{doc_id}{file_extension}")
+    
+    def _copy() -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "wb") as buffer:
+            while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                buffer.write(chunk)
+        return digest.hexdigest()
+    
+    # UploadFile.file is a SpooledTemporaryFile; stream it in fixed-size chunks
+    # off the event loop, hashing as we go, instead of reading it all into memory
+    try:
+        digest = await run_in_threadpool(_copy)
+    except Exception:
+        # Don't leave a partially written upload behind
+        if os.path.exists(file_path):
+            _remove_upload(file_path)
+        raise
+    
+    return doc_id, file_path, digest
+
+async def _process_upload(file_path: str, digest: str, use_cache: bool = True) -> dict:
+    """Process a saved upload, reusing the cached result for identical bytes."""
+    if use_cache:
+        cached = await run_in_threadpool(result_cache.get, digest)
+        if cached is not None:
+            logger.info(f"Using cached result for {file_path} (sha256 {digest})")
+            return cached
+    
+    result = await processor.process_document(file_path)
+    await run_in_threadpool(result_cache.set, digest, result, expire=RESULT_CACHE_TTL)
+    return result
+
+def _use_cache(cache_control: Optional[str]) -> bool:
+    """A `Cache-Control: no-cache` request header forces reprocessing."""
+    return "no-cache" not in (cache_control or "").lower()
+
+def _remove_upload(file_path: str):
+    """Delete a temporary upload, logging rather than raising on failure."""
+    try:
+        os.remove(file_path)
+    except Exception as e:
+        logger.warning(f"Could not delete temporary file {file_path}: {str(e)}")
+
+def _build_response(doc_id: str, result: dict) -> dict:
+    """Shape a pipeline result into a DocumentResponse payload."""
+    return {
+        "document_id": doc_id,
+        "document_type": result["classification"]["document_type"],
+        "confidence": result["classification"]["confidence"],
+        "extracted_text": result["extracted_text"]["text"],
+        "metadata": result["metadata"]
+    }
+
 @app.post("/upload/", response_model=DocumentResponse)
-async def upload_document(file: UploadFile):
+async def upload_document(file: UploadFile, cache_control: Optional[str] = Header(None)):
     """
     Upload and process a document.
     
     This endpoint accepts a document file, saves it temporarily,
     processes it for classification and text extraction, and returns the results.
+    Documents already processed are served from the result cache unless the
+    request sends `Cache-Control: no-cache`.
     """
     try:
-        # Generate a unique ID for the document
-        doc_id = str(uuid.uuid4())
-        file_extension = os.path.splitext(file.filename)[1] if file.filename else '.bin'
-        file_path = os.path.join(UPLOAD_DIR, f"{doc_id}{file_extension}")
-        
-        # Save the uploaded file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # Save the uploaded file under a unique ID
+        doc_id, file_path, digest = await _save_upload(file)
         
         logger.info(f"Processing document: {file.filename} (saved as {file_path})")
         
         # Process the document
-        result = processor.process_document(file_path)
-        
-        # Clean up the uploaded file
         try:
-            os.remove(file_path)
-        except Exception as e:
-            logger.warning(f"Could not delete temporary file {file_path}: {str(e)}")
+            result = await _process_upload(file_path, digest, _use_cache(cache_control))
+        finally:
+            # Clean up the uploaded file
+            _remove_upload(file_path)
         
-        return {
-            "document_id": doc_id,
-            "document_type": result["classification"]["document_type"],
-            "confidence": result["classification"]["confidence"],
-            "extracted_text": result["extracted_text"]["text"],
-            "metadata": result["metadata"]
-        }
+        return _build_response(doc_id, result)
         
     except Exception as e:
         logger.error(f"Error processing document: {str(e)}")
@@ -88,6 +158,60 @@ async def upload_document(file: UploadFile):
             detail=f"Error processing document: {str(e)}"
         )
 
+@app.post("/batch/", response_model=List[DocumentResponse])
+async def upload_documents(files: List[UploadFile], cache_control: Optional[str] = Header(None)):
+    """
+    Upload and process several documents concurrently.
+    
+    Up to BATCH_CONCURRENCY documents are processed in parallel so their
+    OCR polling overlaps.
+    A failure on one document is reported in its own `error` field
+    instead of failing the whole batch. Caching works as for /upload/.
+    """
+    saved = []
+    try:
+        # Save every upload first; the finally below removes whatever was saved
+        for file in files:
+            saved.append(await _save_upload(file))
+        
+        logger.info(f"Processing batch of {len(saved)} documents")
+        
+        use_cache = _use_cache(cache_control)
+        semaphore = asyncio.Semaphore(max(1, BATCH_CONCURRENCY))
+        
+        async def _process_limited(file_path: str, digest: str) -> dict:
+            async with semaphore:
+                return await _process_upload(file_path, digest, use_cache)
+        
+        results = await asyncio.gather(
+            *[_process_limited(file_path, digest) for _, file_path, digest in saved],
+            return_exceptions=True
+        )
+    except Exception as e:
+        logger.error(f"Error processing batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing batch: {str(e)}"
+        )
+    finally:
+        for _, file_path, _ in saved:
+            _remove_upload(file_path)
+    
+    responses = []
+    for (doc_id, _, _), result in zip(saved, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error processing document {doc_id}: {str(result)}")
+            responses.append({
+                "document_id": doc_id,
+                "document_type": "unknown",
+                "confidence": 0.0,
+                "error": str(result)
+            })
+        else:
+            responses.append(_build_response(doc_id, result))
+    
+    return responses
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
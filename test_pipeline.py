@@ -1,6 +1,8 @@
 import os
 import sys
-import json
+import asyncio
+import time
+import orjson
 import logging
 from pathlib import Path
 from datetime import datetime
@@ -50,17 +52,17 @@ def process_document(document_path: str, output_dir: str = "output"):
         
         # Process the document
         logger.info(f"Processing document: {document_path}")
-        start_time = datetime.utcnow()
-        result = processor.process_document(document_path)
-        processing_time = (datetime.utcnow() - start_time).total_seconds()
+        start_time = time.monotonic_ns()
+        result = asyncio.run(processor.process_document(document_path))
+        processing_time = (time.monotonic_ns() - start_time) / 1e9
         
         # Generate output filename
         base_name = os.path.splitext(os.path.basename(document_path))[0]
         output_file = os.path.join(output_dir, f"{base_name}_results.json")
         
         # Save results
-        with open(output_file, 'w') as f:
-            json.dump(result, f, indent=2, default=str)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(result, default=str, option=orjson.OPT_INDENT_2))
         
         # Print summary
         logger.info(f"Processing completed in {processing_time:.2f} seconds")
@@ -163,26 +165,26 @@ def test_data_extractor(output_dir="test_output"):
         output = []
         
         # Add extracted fields
-        if 'extracted_fields' in result and result['extracted_fields']:
+        if result.extracted_fields:
             output.append("=== EXTRACTED FIELDS ===")
-            for field, value in result['extracted_fields'].items():
+            for field, value in result.extracted_fields.items():
                 output.append(f"{field}: {value}")
         else:
             output.append("No fields were extracted.")
         
         # Add validation results
-        if 'validation' in result:
+        if result.validation is not None:
             output.append("\n=== VALIDATION ===")
-            output.append(f"Is Valid: {result['validation']['is_valid']}")
+            output.append(f"Is Valid: {result.validation.is_valid}")
             
-            if result['validation']['errors']:
+            if result.validation.errors:
                 output.append("\nErrors:")
-                for error in result['validation']['errors']:
+                for error in result.validation.errors:
                     output.append(f"- {error}")
                     
-            if result['validation']['warnings']:
+            if result.validation.warnings:
                 output.append("\nWarnings:")
-                for warning in result['validation']['warnings']:
+                for warning in result.validation.warnings:
                     output.append(f"- {warning}")
         
         # Print to console
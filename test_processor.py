@@ -1,5 +1,6 @@
 import os
 import sys
+import asyncio
 from src.document_processor import HealthcareDocumentProcessor
 
 def test_document_processing(document_path):
@@ -11,7 +12,7 @@ def test_document_processing(document_path):
     
     try:
         # Process the document
-        result = processor.process_document(document_path)
+        result = asyncio.run(processor.process_document(document_path))
         
         # Print results
         print("\n=== Processing Results ===")
@@ -0,0 +1,195 @@
+import sys
+import time
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src import data_extractor
+from src.data_extractor import HealthcareDataExtractor
+
+UNICODE_TEXT = "Patient: Élodie Durand\nProvider: Ñúñez\nDOB: ١٢/٠١/١٩٨٠"
+
+SAMPLE_DOCS = [
+    ("insurance_claim", (Path(__file__).parent.parent / "sample_docs" / "sample_claim.txt").read_text()),
+    ("insurance_claim", """
+    PATIENT INFORMATION
+    Name: John Doe
+    Date of Birth: 01/15/1980
+    Member ID: ABC123456
+    Claim #: CLM987654
+    Date of Service: 05/10/2023
+    Provider: Dr. Smith
+    Diagnosis Code: E11.65
+    Total Amount: $150.00
+    """),
+    ("prescription", """
+    Patient: Jane Smith
+    Medication: Amoxicillin
+    Dosage: 500mg
+    Frequency: Every 8 hours
+    Refills: 2
+    Prescriber: Dr. Johnson
+    """),
+    ("medical_report", """
+    Patient: Ann Lee
+    Report Type: Radiology
+    DOB: 13/05/2023
+    Findings: No acute issues, mild swelling.
+    Impression: Normal study.
+    """),
+    ("unknown", UNICODE_TEXT),
+    ("prescription", "Patient: John Doe\fMedication: Amoxicillin\fDosage: 500mg"),
+    ("prescription", "Patient: John Doe\rMedication: Amoxicillin\rDosage: 500mg\rPrescriber: Dr. Lee"),
+    ("medical_report", "Patient: Ann Lee\vReport Type: Radiology\x1cFindings: Clear\x1dImpression: Normal\x1e"),
+    ("prescription", "Patient: \nPrescriber \nMedication:\t\nMedication: Ibuprofen\nPrescriber: Dr. Lee"),
+    ("medical_report", "Report Type:\nFindings:  \nImpression: \nFindings: Clear\nImpression: Normal"),
+]
+
+class TestRe2Prefilter(unittest.TestCase):
+    """The optional RE2 prefilter must not change what gets extracted."""
+
+    @unittest.skipIf(data_extractor.re2 is None, "google-re2 not installed")
+    def test_re2_and_re_paths_match(self):
+        with_re2 = HealthcareDataExtractor()
+        without_re2 = HealthcareDataExtractor()
+        without_re2._prefilter = None
+        without_re2._doc_type_prefilters = {}
+
+        for doc_type, text in SAMPLE_DOCS:
+            with self.subTest(doc_type=doc_type, text=text[:30]):
+                self.assertEqual(
+                    with_re2.extract_structured_data(text, doc_type).extracted_fields,
+                    without_re2.extract_structured_data(text, doc_type).extracted_fields
+                )
+
+    def test_unicode_fields_extracted(self):
+        result = HealthcareDataExtractor().extract_structured_data(UNICODE_TEXT)
+        self.assertEqual(result.extracted_fields['patient_name'], 'Élodie Durand')
+        self.assertEqual(result.extracted_fields['provider_name'], 'Ñúñez')
+
+class TestBatchExtraction(unittest.TestCase):
+    """extract_structured_data_batch must agree with extract_structured_data."""
+
+    def test_batch_matches_single_document(self):
+        extractor = HealthcareDataExtractor()
+        df = extractor.extract_structured_data_batch(
+            [text for _, text in SAMPLE_DOCS],
+            [doc_type for doc_type, _ in SAMPLE_DOCS]
+        )
+
+        for position, (doc_type, text) in enumerate(SAMPLE_DOCS):
+            with self.subTest(doc_type=doc_type, text=text[:30]):
+                row = df.iloc[position].drop('document_type')
+                batch_fields = {field: value for field, value in row.items() if pd.notna(value)}
+                single_fields = extractor.extract_structured_data(text, doc_type).extracted_fields
+                self.assertEqual(batch_fields, single_fields)
+
+    def test_invalid_date_kept_as_is(self):
+        df = HealthcareDataExtractor().extract_structured_data_batch(
+            ["DOB: 13/05/2023", "DOB: 05/13/2023"],
+            ["unknown", "unknown"]
+        )
+        self.assertEqual(df['date_of_birth'].tolist(), ['13/05/2023', '2023-05-13'])
+
+    def test_empty_value_skips_to_next_line(self):
+        text = "Findings:  \nFindings: Clear"
+        extractor = HealthcareDataExtractor()
+        df = extractor.extract_structured_data_batch([text], ["medical_report"])
+        self.assertEqual(df['findings'].tolist(), ['Clear'])
+        self.assertEqual(
+            extractor.extract_structured_data(text, "medical_report").extracted_fields,
+            {'findings': 'Clear'}
+        )
+
+class TestLongValues(unittest.TestCase):
+    """Values on long lines are captured whole, not truncated or dropped."""
+
+    def test_long_free_text_not_truncated(self):
+        findings = "Mild swelling noted. " * 15
+        result = HealthcareDataExtractor().extract_structured_data(
+            f"Patient: Ann Lee\nReport Type: Radiology\nFindings: {findings}\n",
+            'medical_report'
+        )
+        self.assertEqual(result.extracted_fields['findings'], findings.strip())
+
+    def test_long_line_value_kept(self):
+        medication = "Amoxicillin " * 30
+        result = HealthcareDataExtractor().extract_structured_data(
+            f"Patient: Jane Smith\nMedication: {medication}\nDosage: 500mg\n",
+            'prescription'
+        )
+        self.assertEqual(result.extracted_fields['medication'], medication.strip())
+        self.assertTrue(result.validation.is_valid)
+
+class TestDateParsing(unittest.TestCase):
+    """Remembering the last date format must not break documents that mix formats."""
+
+    def test_mixed_formats_through_one_extractor(self):
+        extractor = HealthcareDataExtractor()
+        for raw, expected in [
+            ("01/15/1980", "1980-01-15"),
+            ("05-10-23", "2023-05-10"),
+            ("2023-05-10", "2023-05-10"),
+            ("01/15/1980", "1980-01-15"),
+            ("5/10/23", "2023-05-10"),
+        ]:
+            with self.subTest(raw=raw):
+                fields, validation = extractor._post_process_fields({'date_of_birth': raw})
+                self.assertEqual(fields['date_of_birth'], expected)
+                self.assertEqual(validation.warnings, [])
+
+class TestValidation(unittest.TestCase):
+    """Post-processing and validation run in one pass over the fields."""
+
+    def test_unparseable_date_warns_once_and_keeps_raw(self):
+        fields, validation = HealthcareDataExtractor()._post_process_fields(
+            {'date_of_birth': '13/05/2023', 'amount': '$1,250.00'}
+        )
+        self.assertEqual(fields, {'date_of_birth': '13/05/2023', 'amount': 1250.0})
+        self.assertEqual(validation.warnings, ["Invalid date format for date_of_birth: 13/05/2023"])
+        self.assertTrue(validation.is_valid)
+
+    def test_missing_required_fields_invalid(self):
+        result = HealthcareDataExtractor().extract_structured_data(
+            "Patient: Jane Smith\nMedication: Amoxicillin\n", 'prescription'
+        )
+        self.assertFalse(result.validation.is_valid)
+        self.assertEqual(result.validation.errors, ["Missing required field: dosage"])
+
+    def test_required_fields_present_valid(self):
+        result = HealthcareDataExtractor().extract_structured_data(SAMPLE_DOCS[2][1], 'prescription')
+        self.assertTrue(result.validation.is_valid)
+        self.assertEqual(result.validation.errors, [])
+
+class TestBacktracking(unittest.TestCase):
+    """Long adversarial lines must be handled in roughly linear time."""
+
+    ADVERSARIAL_DOCS = [
+        ("prescription", "Medication: é\n" + "Dosage " * 8000 + "!"),
+        ("medical_report", "Report Type " * 8000 + "!é"),
+        ("insurance_claim", "Amount" + " " * 20000 + "é!"),
+        ("insurance_claim", "Patient responsibility" + " " * 20000 + "é!"),
+        ("insurance_claim", "Claim" + " " * 20000 + "é!"),
+    ]
+
+    def test_adversarial_lines_are_fast(self):
+        extractor = HealthcareDataExtractor()
+        for doc_type, text in self.ADVERSARIAL_DOCS:
+            with self.subTest(text=text[:30]):
+                start = time.monotonic()
+                extractor.extract_structured_data(text, doc_type)
+                self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_value_outside_format_skips_to_next_line(self):
+        result = HealthcareDataExtractor().extract_structured_data(
+            "Medication: Amoxicillin (see note)\nMedication: Ibuprofen\n",
+            'prescription'
+        )
+        self.assertEqual(result.extracted_fields['medication'], 'Ibuprofen')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src import document_processor
+from src.document_processor import HealthcareDocumentProcessor
+
+# "report" appears before "claim", but claim has the higher precedence
+MIXED_KEYWORD_TEXT = "Lab report attached\nClaim form for services rendered"
+
+def _analysis_result(doc_type=None, page_lines=()):
+    """Build a minimal stand-in for a Form Recognizer AnalyzeResult."""
+    documents = [SimpleNamespace(doc_type=doc_type)] if doc_type is not None else []
+    lines = [SimpleNamespace(content=content) for content in page_lines]
+    return SimpleNamespace(documents=documents, pages=[SimpleNamespace(lines=lines)])
+
+class TestMatchDocumentType(unittest.TestCase):
+    """Keyword precedence must not depend on whether pyahocorasick is installed."""
+
+    def _assert_both_paths(self, text, expected):
+        paths = [("substring", None)]
+        if document_processor._KEYWORD_AUTOMATON is not None:
+            paths.append(("aho-corasick", document_processor._KEYWORD_AUTOMATON))
+        for name, automaton in paths:
+            with self.subTest(path=name), \
+                    mock.patch.object(document_processor, "_KEYWORD_AUTOMATON", automaton):
+                self.assertEqual(HealthcareDocumentProcessor._match_document_type(text), expected)
+
+    def test_precedence_beats_position(self):
+        self._assert_both_paths(MIXED_KEYWORD_TEXT, "insurance_claim")
+
+    def test_lower_precedence_keywords(self):
+        self._assert_both_paths("Medical REPORT with prescription notes", "prescription")
+        self._assert_both_paths("Radiology report", "medical_report")
+
+    def test_no_keyword(self):
+        self._assert_both_paths("Patient intake form", None)
+
+class TestDetermineDocumentType(unittest.TestCase):
+    """The model's doc_type wins; otherwise only the first page's heading lines count."""
+
+    def setUp(self):
+        self.processor = HealthcareDocumentProcessor()
+
+    def test_model_doc_type_preferred(self):
+        result = _analysis_result("prebuilt:prescription", [MIXED_KEYWORD_TEXT])
+        self.assertEqual(self.processor._determine_document_type(result), "prescription")
+
+    def test_falls_back_to_page_lines(self):
+        result = _analysis_result("prebuilt:document", ["Radiology report", "Claim #: 123"])
+        self.assertEqual(self.processor._determine_document_type(result), "insurance_claim")
+
+    def test_only_first_lines_scanned(self):
+        filler = ["Patient details"] * document_processor.DOCUMENT_TYPE_SCAN_LINES
+        result = _analysis_result(None, filler + ["Claim #: 123"])
+        self.assertEqual(self.processor._determine_document_type(result), "unknown")
+
+        result = _analysis_result(None, filler[1:] + ["Claim #: 123"])
+        self.assertEqual(self.processor._determine_document_type(result), "insurance_claim")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from diskcache import Cache
+from fastapi.testclient import TestClient
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src import main
+
+def _pipeline_result(document_type: str) -> dict:
+    """A canned process_document result."""
+    return {
+        "classification": {"document_type": document_type, "confidence": 0.9},
+        "extracted_text": {"text": "Patient: Jane Smith", "language": "en", "pages": 1},
+        "structured_data": {},
+        "metadata": {"filename": "doc.txt"}
+    }
+
+class TestResultCache(unittest.TestCase):
+    """Identical uploads are served from the result cache until it expires or is bypassed."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cache = Cache(str(Path(tmp.name) / "cache"))
+        self.addCleanup(cache.close)
+
+        self.process_document = mock.AsyncMock(return_value=_pipeline_result("prescription"))
+        for patcher in (
+            mock.patch.object(main, "result_cache", cache),
+            mock.patch.object(main, "UPLOAD_DIR", tmp.name),
+            mock.patch.object(main.processor, "process_document", self.process_document),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.cache = cache
+        self.client = TestClient(main.app)
+
+    def _upload(self, content: bytes = b"Medication: Amoxicillin", headers=None):
+        response = self.client.post(
+            "/upload/", files={"file": ("doc.txt", content)}, headers=headers or {}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_identical_upload_hits_cache(self):
+        first = self._upload()
+        second = self._upload()
+        self.assertEqual(self.process_document.await_count, 1)
+        self.assertEqual(second["document_type"], first["document_type"])
+        self.assertNotEqual(second["document_id"], first["document_id"])
+
+        self._upload(b"Medication: Ibuprofen")
+        self.assertEqual(self.process_document.await_count, 2)
+
+    def test_no_cache_header_bypasses_and_refreshes(self):
+        self._upload()
+        self.process_document.return_value = _pipeline_result("medical_report")
+
+        refreshed = self._upload(headers={"Cache-Control": "no-cache"})
+        self.assertEqual(self.process_document.await_count, 2)
+        self.assertEqual(refreshed["document_type"], "medical_report")
+
+        # The refreshed result replaces the cached one
+        cached = self._upload()
+        self.assertEqual(self.process_document.await_count, 2)
+        self.assertEqual(cached["document_type"], "medical_report")
+
+    def test_entries_expire_after_ttl(self):
+        with mock.patch.object(main, "RESULT_CACHE_TTL", 60):
+            before = time.time()
+            self._upload()
+
+        (_, expire_time), = [
+            self.cache.get(key, expire_time=True) for key in self.cache.iterkeys()
+        ]
+        self.assertGreaterEqual(expire_time, before + 60)
+        self.assertLessEqual(expire_time, time.time() + 60)
+
+        # Once expired the document is processed again
+        with mock.patch("diskcache.core.time.time", return_value=expire_time + 1):
+            self._upload()
+        self.assertEqual(self.process_document.await_count, 2)
+
+    def test_uploads_removed_after_processing(self):
+        self._upload()
+        self.assertEqual(list(Path(main.UPLOAD_DIR).glob("*.txt")), [])
+
+if __name__ == "__main__":
+    unittest.main()